@@ -1,16 +1,25 @@
+import hashlib
 import networkx as nx
 import matplotlib.pyplot as plt
 import json
 import community as community_louvain
+import igraph as ig
+import leidenalg
 
 class Clustering:
     """
     A class to read graph data from a JSON file, create a NetworkX graph,
-    cluster the graph using the Louvain method, and visualize the clusters.
+    cluster the graph using the Leiden (or Louvain) method, and visualize the clusters.
     """
     def __init__(self, file_path="data/graph.json"):
         self.file_path = file_path
         self.graph_data = None
+
+        # Integer-keyed side tables filled by create_graph: original id ->
+        # integer node, integer node -> original id, integer node -> attributes
+        self.node_ids = {}
+        self.node_labels = {}
+        self.node_table = {}
     
     def read_json(self):
         """Read articles from the JSON file."""
@@ -31,46 +40,149 @@ class Clustering:
         :return: A NetworkX graph object.
         """
         G = nx.Graph()
+        nodes = self.graph_data["nodes"]
+
+        # Use compact integer node IDs and keep labels/properties in side
+        # tables, so the graph itself stores no per-node attribute dicts
+        self.node_ids = {node["id"]: i for i, node in enumerate(nodes)}
+        self.node_labels = {i: node["id"] for i, node in enumerate(nodes)}
+        self.node_table = {
+            i: dict(labels=node["labels"], **node["properties"])
+            for i, node in enumerate(nodes)
+        }
 
-        # Add nodes
-        for node in self.graph_data["nodes"]:
-            G.add_node(node["id"], labels=node["labels"], **node["properties"])
+        # Add nodes in bulk
+        G.add_nodes_from(range(len(nodes)))
 
-        # Add edges
-        for rel in self.graph_data["relationships"]:
-            if rel["start"] in G and rel["end"] in G:
-                # Add edge with properties
-                G.add_edge(rel["start"], rel["end"], type=rel["type"], name=rel['properties']['type'])
+        # Add edges in bulk (with properties), skipping dangling endpoints
+        node_ids = self.node_ids
+        G.add_edges_from(
+            (node_ids[rel["start"]], node_ids[rel["end"]],
+             {"type": rel["type"], "name": rel["properties"]["type"]})
+            for rel in self.graph_data["relationships"]
+            if rel["start"] in node_ids and rel["end"] in node_ids
+        )
 
         return G
     
-    def cluster_graph(self, G):
+    def to_igraph(self, G):
+        """
+        Convert a NetworkX graph to an igraph graph.
+        :param G: The NetworkX graph to convert.
+        :return: A tuple of (igraph graph, list of nodes in igraph vertex order).
+        """
+        nodes = list(G.nodes())
+        idx = {n: i for i, n in enumerate(nodes)}
+        edges = [(idx[u], idx[v]) for u, v in G.edges()]
+        ig_g = ig.Graph(n=len(nodes), edges=edges)
+        return ig_g, nodes
+
+    def cluster_graph(self, G, method="leiden", use_igraph=True):
         """
-        Cluster the graph using the Louvain method.
+        Cluster the graph into communities.
         :param G: The graph to cluster.
+        :param method: "leiden" (default, faster and guarantees connected
+                       communities), "louvain", or "cugraph" (Louvain on
+                       GPU; requires a CUDA machine with RAPIDS installed).
+        :param use_igraph: For Louvain, use igraph's C implementation
+                           (much faster than the pure-Python one).
         :return: A dictionary mapping nodes to their cluster labels.
         """
+        if method == "cugraph":
+            # Imported lazily: RAPIDS is only available on CUDA machines
+            # (install with: pip install cudf-cu12 cugraph-cu12)
+            import cudf
+            import cugraph
+            edges = cudf.DataFrame(list(G.edges()), columns=["src", "dst"])
+            gpu_g = cugraph.Graph()
+            gpu_g.from_cudf_edgelist(edges, source="src", destination="dst")
+            parts, _ = cugraph.louvain(gpu_g)
+            partition = dict(zip(parts["vertex"].to_pandas(), parts["partition"].to_pandas()))
+            # Isolated nodes never enter the edge list, so cugraph assigns
+            # them no community; give each its own cluster
+            next_cluster = max(partition.values(), default=-1) + 1
+            for node in G.nodes():
+                if node not in partition:
+                    partition[node] = next_cluster
+                    next_cluster += 1
+            return partition
+
+        if method == "leiden":
+            ig_g, nodes = self.to_igraph(G)
+            part = leidenalg.find_partition(ig_g, leidenalg.ModularityVertexPartition)
+            return {nodes[i]: c for i, c in enumerate(part.membership)}
+
+        if use_igraph:
+            ig_g, nodes = self.to_igraph(G)
+            membership = ig_g.community_multilevel().membership
+            return {nodes[i]: c for i, c in enumerate(membership)}
+
         partition = community_louvain.best_partition(G)
         return partition
 
+    def graph_digest(self, G):
+        """
+        Digest of the graph's original node labels and sorted edge list,
+        used to detect when a persisted layout belongs to a different graph
+        (integer node IDs alone would collide on any equal-sized dataset).
+        :param G: The graph to fingerprint.
+        :return: A hex digest string.
+        """
+        nodes = sorted(str(self.node_labels.get(n, n)) for n in G.nodes())
+        edges = sorted(
+            sorted((str(self.node_labels.get(u, u)), str(self.node_labels.get(v, v))))
+            for u, v in G.edges()
+        )
+        payload = json.dumps([nodes, edges]).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+
+    def compute_layout(self, G, layout_path="data/layout.json"):
+        """
+        Compute a deterministic spring layout for the graph, reusing the
+        persisted layout from a previous run when its digest matches.
+        :param G: The graph to lay out.
+        :param layout_path: Path of the persisted layout JSON.
+        :return: A dictionary mapping nodes to (x, y) positions.
+        """
+        digest = self.graph_digest(G)
+        try:
+            with open(layout_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get("digest") == digest:
+                positions = stored["positions"]
+                return {n: positions[str(n)] for n in G.nodes()}
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+        # Seeded so the layout is reproducible across runs
+        pos = nx.spring_layout(G, seed=42)
+        with open(layout_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "digest": digest,
+                "positions": {str(n): [float(x), float(y)] for n, (x, y) in pos.items()},
+            }, f)
+        return pos
+
     def visualize_clusters(self, G, partition):
         """
         Visualize the clusters in the graph.
         :param G: The graph to visualize.
         :param partition: The partition of nodes into clusters.
         """
-        pos = nx.spring_layout(G)
+        pos = self.compute_layout(G)
         plt.figure(figsize=(12, 8))
 
-        # Draw nodes with colors based on their cluster
+        # Draw nodes with colors based on their cluster, indexed by node so
+        # the colors line up with G.nodes() regardless of dict order
         cmap = plt.get_cmap('viridis', max(partition.values()) + 1)
-        nx.draw_networkx_nodes(G, pos, node_color=list(partition.values()), cmap=cmap, node_size=50)
+        node_colors = [partition[node] for node in G.nodes()]
+        nx.draw_networkx_nodes(G, pos, node_color=node_colors, cmap=cmap, node_size=50)
         
         # Draw edges
         nx.draw_networkx_edges(G, pos, alpha=0.5)
         
-        # Draw labels
-        nx.draw_networkx_labels(G, pos, font_size=8)
+        # Draw labels (map integer nodes back to their original IDs)
+        nx.draw_networkx_labels(G, pos, labels=self.node_labels, font_size=8)
 
         plt.title("Graph Clustering Visualization")
         plt.show()
@@ -1,13 +1,65 @@
 import csv
-import requests
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from time import sleep
-import random
+import hishel
+import httpx
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import html as lxml_html, etree
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from time import monotonic, sleep
+import threading
 import json
 from summarizer import Summarizer
 import re
 
+# Strainers restrict BS4 tree construction to the subtree of interest, so the
+# rest of the page is never instantiated as Python objects.
+STRAINER_WIKI = SoupStrainer(id="mw-content-text")
+STRAINER_INVESTOPEDIA = SoupStrainer(id="mntl-sc-page_1-0")
+STRAINER_TITLE = SoupStrainer("title")
+
+# Compiled XPath union of the common article content selectors, tried in a
+# single pass instead of one BS4 CSS query per selector.
+CONTENT_XPATH = etree.XPath(
+    "(//article | //*[@role='main'] | //main"
+    " | //*[contains(@class, 'content')] | //*[@id='content']"
+    " | //*[contains(@class, 'article-body')])[1]"
+)
+# Fallback: paragraphs with enough text to be article prose
+PARAGRAPH_XPATH = etree.XPath("//p[string-length(normalize-space()) > 50]")
+
+class ThrottledTransport(httpx.BaseTransport):
+    """An httpx transport that enforces a minimum interval between requests
+    to the same host. Sitting below the cache transport, it only delays
+    requests that actually go out on the network.
+    """
+
+    def __init__(self, transport, rate_limit):
+        """
+        :param transport: The underlying httpx transport to delegate to.
+        :param rate_limit: Minimum seconds between requests per host.
+        """
+        self.transport = transport
+        self.rate_limit = rate_limit
+
+        # Next allowed request time per hostname, so threads fetching
+        # different hosts never wait on each other
+        self.host_next_allowed = {}
+        self.rate_lock = threading.Lock()
+
+    def handle_request(self, request):
+        host = request.url.host
+        with self.rate_lock:
+            now = monotonic()
+            next_allowed = self.host_next_allowed.get(host, now)
+            self.host_next_allowed[host] = max(next_allowed, now) + self.rate_limit
+        wait_time = next_allowed - now
+        if wait_time > 0:
+            sleep(wait_time)
+        return self.transport.handle_request(request)
+
+    def close(self):
+        self.transport.close()
+
+
 class ArticleExtractor:
     """
     A class to extract articles from a CSV file containing URLs.
@@ -17,11 +69,15 @@ class ArticleExtractor:
     It also includes a summarization feature using a language model.
     """
 
-    def __init__(self, csv_path, max_workers=10, rate_limit=1.0):
+    def __init__(self, csv_path, max_workers=10, rate_limit=1.0,
+                 cache_enabled=True, cache_dir="data/http_cache"):
         """
         :param csv_path: Path to the CSV file containing URLs.
         :param max_workers: Number of threads for parallel processing.
         :param rate_limit: Minimum seconds between requests per thread.
+        :param cache_enabled: Cache HTTP responses on disk so reruns over
+                              the same URLs skip the network entirely.
+        :param cache_dir: Directory for the on-disk HTTP cache.
         """
         self.csv_path = csv_path
         self.max_workers = max_workers
@@ -31,10 +87,35 @@ class ArticleExtractor:
         # Each article will be a dictionary with keys: url, title, content, summary
         self.articles = []
 
+        # Shared HTTP client: keep-alive connections (and HTTP/2 where the
+        # server supports it) are reused across all worker threads instead
+        # of opening a fresh TCP+TLS connection per request. Per-host rate
+        # limiting lives in the transport below the cache layer, so only
+        # requests that actually hit the network are delayed.
+        transport = ThrottledTransport(httpx.HTTPTransport(http2=True), self.rate_limit)
+        if cache_enabled:
+            # force_cache stores responses even when servers send no-cache
+            # headers; article pages are effectively immutable for our use
+            transport = hishel.CacheTransport(
+                transport=transport,
+                storage=hishel.FileStorage(base_path=cache_dir),
+                controller=hishel.Controller(force_cache=True),
+            )
+        self.http_client = httpx.Client(
+            transport=transport,
+            headers={"User-Agent": "Mozilla/5.0 (compatible; ArticleExtractor/1.0)"},
+            timeout=10,
+            follow_redirects=True,
+        )
+
         # a LLM model for summarization
         # You can replace this with your own summarization model
         self.summarizer = Summarizer()
 
+    def close(self):
+        """Close the shared HTTP client."""
+        self.http_client.close()
+
     def read_csv(self):
         """Read URLs from the CSV file."""
         # Assuming the CSV file has two columns: website_name and url
@@ -60,15 +141,46 @@ class ArticleExtractor:
             # You can add more specific handlers for other websites here
             return self.extract_article(url)
     
-    def process(self):
-        """Process all URLs in parallel and collect results."""
-        items = self.read_csv()
-        results = []
+    def iter_results(self, items):
+        """Yield extraction results as they complete.
+
+        Keeps a bounded window of in-flight futures rather than submitting
+        every URL up front, so the executor's internal queue (and the
+        futures held alive by it) stays small no matter the CSV size.
+        """
+        max_pending = self.max_workers * 2
+        pending = set()
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_url = {executor.submit(self.fetch_and_extract, website_name, url): url for (website_name, url) in items}
-            for future in as_completed(future_to_url):
-                result = future.result()
-                results.append(result)
+            for website_name, url in items:
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(executor.submit(self.fetch_and_extract, website_name, url))
+            for future in as_completed(pending):
+                yield future.result()
+
+    def process(self, output_path=None):
+        """Process all URLs in parallel.
+        :param output_path: If given, stream each article to this JSON file
+                            as it completes instead of collecting them all
+                            in memory; otherwise collect into self.articles.
+        """
+        items = self.read_csv()
+
+        if output_path is not None:
+            with open(output_path, 'w', encoding='utf-8') as jsonfile:
+                jsonfile.write('[')
+                for count, result in enumerate(self.iter_results(items)):
+                    if count:
+                        jsonfile.write(',')
+                    # Indent each element to match json.dump(..., indent=2)
+                    dumped = json.dumps(result, ensure_ascii=False, indent=2)
+                    jsonfile.write('\n' + '\n'.join('  ' + line for line in dumped.split('\n')))
+                jsonfile.write('\n]')
+            return
+
+        results = list(self.iter_results(items))
         self.articles = results
         return results
 
@@ -86,18 +198,22 @@ class ArticleExtractor:
         with open(output_path, 'w', encoding='utf-8') as jsonfile:
             json.dump(self.articles, jsonfile, ensure_ascii=False, indent=2)
 
-    def soup_clean_up(self, soup):
-        """Clean up the BeautifulSoup object by removing unwanted elements."""
-        # Remove unwanted elements
-        for element in soup.find_all(['script', 'style', 'nav', 'footer', 'header', 'aside']):
+    def clean_content_soup(self, soup):
+        """Remove clutter that can still occur inside the article subtree.
+
+        The strainers already keep page chrome (nav, header, footer, aside,
+        category links) out of the tree, so only in-article clutter is left.
+        """
+        # Remove embedded scripts and styles
+        for element in soup.find_all(['script', 'style']):
             element.decompose()
 
         # Remove Wikipedia-specific clutter
         for element in soup.find_all(class_=['navbox', 'infobox', 'sidebar', 'metadata']):
             element.decompose()
 
-        # Remove elements with common unwanted IDs
-        for element in soup.find_all(id=['toc', 'catlinks', 'external-links', 'references']):
+        # Remove the table of contents and reference list
+        for element in soup.find_all(id=['toc', 'references']):
             element.decompose()
 
         # Remove citation links like [1], [2], etc.
@@ -105,50 +221,42 @@ class ArticleExtractor:
             sup.decompose()
 
         return
-    
+
+    def extract_title(self, resp):
+        """Extract the page title with a tiny strainer-restricted parse."""
+        title_soup = BeautifulSoup(resp.content, 'lxml', from_encoding=resp.encoding,
+                                   parse_only=STRAINER_TITLE)
+        if title_soup.title and title_soup.title.string:
+            return title_soup.title.string.strip()
+        return "No Title Found"
+
     def extract_article(self, url):
         """Extract article content from a generic URL."""
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (compatible; ArticleExtractor/1.0)"
-            }
-            resp = requests.get(url, headers=headers, timeout=10)
+            resp = self.http_client.get(url)
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, 'html.parser')
+            # Parse with raw lxml; its compiled XPath engine is far faster
+            # than building a BS4 tree and running CSS selectors over it.
+            root = lxml_html.fromstring(resp.content)
 
-            # Clean up the soup object
-            self.soup_clean_up(soup)
+            # Drop boilerplate elements whose text would pollute the content
+            etree.strip_elements(root, 'script', 'style', 'nav', 'footer',
+                                 'header', 'aside', with_tail=False)
 
             # Extract title
-            title = soup.title.string.strip() if soup.title else "No Title Found"
+            title = self.extract_title(resp)
 
-            # Rule-based content extraction
+            # Rule-based content extraction: one pass over the compiled
+            # union of common article content selectors
             content = ""
-            
-            # Try common article content selectors in order of priority
-            content_selectors = [
-                'article',
-                '[role="main"]',
-                'main',
-                '.content',
-                '.article-content',
-                '.post-content',
-                '#content',
-                '.entry-content',
-                '.article-body'
-            ]
-            
-            for selector in content_selectors:
-                content_element = soup.select_one(selector)
-                if content_element:
-                    content = content_element.get_text(separator='\n', strip=True)
-                    break
-            
+            content_elements = CONTENT_XPATH(root)
+            if content_elements:
+                content = content_elements[0].text_content()
+
             # Fallback: extract from body and filter paragraphs
             if not content:
-                paragraphs = soup.find_all('p')
-                content = '\n'.join([p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 50])
-            
+                content = '\n'.join(p.text_content().strip() for p in PARAGRAPH_XPATH(root))
+
             # Clean up content
             content = re.sub(r'\s+', ' ', content)
             content = content.strip()
@@ -156,9 +264,6 @@ class ArticleExtractor:
             # Generate a summary if content is available
             summary = self.summarizer.get_summary(content) if content else None
 
-            # Respect rate limiting
-            sleep(self.rate_limit + random.uniform(0, 0.5))
-
             return {
                 'url': url,
                 'title': title,
@@ -178,17 +283,16 @@ class ArticleExtractor:
     def extract_wiki_article(self, url):
         """Extract article content from a Wikipedia URL."""
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (compatible; ArticleExtractor/1.0)"
-            }
-            resp = requests.get(url, headers=headers, timeout=10)
+            resp = self.http_client.get(url)
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, 'html.parser')
+            # Only build the article subtree; the rest of the page is skipped
+            soup = BeautifulSoup(resp.content, 'lxml', from_encoding=resp.encoding,
+                                 parse_only=STRAINER_WIKI)
 
-            # Clean up the soup object
-            self.soup_clean_up(soup)
+            # Clean up the content subtree
+            self.clean_content_soup(soup)
 
-            title = soup.title.string.strip() if soup.title else "No Title Found"
+            title = self.extract_title(resp)
 
             # Extract main content (look for a specific ID)
             content_element = soup.find(id="mw-content-text")
@@ -199,9 +303,6 @@ class ArticleExtractor:
             # Generate a summary
             summary = self.summarizer.get_summary(content)
 
-            # Respect rate limiting
-            sleep(self.rate_limit + random.uniform(0, 0.5))
-
             return {
                 'url': url,
                 'title': title,
@@ -221,18 +322,17 @@ class ArticleExtractor:
     def extract_investopedia_article(self, url):
         """Extract article content from an Investopedia URL."""
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (compatible; ArticleExtractor/1.0)"
-            }
-            resp = requests.get(url, headers=headers, timeout=10)
+            resp = self.http_client.get(url)
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, 'html.parser')
+            # Only build the article subtree; the rest of the page is skipped
+            soup = BeautifulSoup(resp.content, 'lxml', from_encoding=resp.encoding,
+                                 parse_only=STRAINER_INVESTOPEDIA)
 
-            # Clean up the soup object
-            self.soup_clean_up(soup)
+            # Clean up the content subtree
+            self.clean_content_soup(soup)
 
             # Extract title
-            title = soup.title.string.strip() if soup.title else "No Title Found"
+            title = self.extract_title(resp)
 
             # Extract main content (look for a specific ID)
             # This is specific to the Investopedia article structure
@@ -244,9 +344,6 @@ class ArticleExtractor:
             # Generate a summary
             summary = self.summarizer.get_summary(content)
 
-            # Respect rate limiting
-            sleep(self.rate_limit + random.uniform(0, 0.5))
-
             return {
                 'url': url,
                 'title': title,
@@ -268,8 +365,8 @@ if __name__ == "__main__":
     # instantiate the extractor
     extractor = ArticleExtractor(csv_path='data/FinCatch_Sources_Medium.csv', max_workers=10, rate_limit=1.0)
     
-    # process the CSV file and extract articles
-    extractor.process()
+    # process the CSV file, streaming extracted articles straight to disk
+    extractor.process(output_path='data/extracted_articles.json')
 
-    # save the extracted articles to a CSV file
-    extractor.save_to_json('data/extracted_articles.json')
+    # close the shared HTTP client
+    extractor.close()
@@ -1,4 +1,7 @@
+import hashlib
 import os
+import sqlite3
+import threading
 from openai import OpenAI
 
 class Summarizer:
@@ -8,7 +11,7 @@ class Summarizer:
     This class requires the OpenAI API key to be set in the environment variable OPENAI_API_KEY.
     """
 
-    def __init__(self):
+    def __init__(self, cache_path="data/.summary_cache.sqlite"):
         # Initialize the OpenAI API client
         # Can also use pipeline() from transformers
         # to load a summarization model
@@ -21,10 +24,28 @@ class Summarizer:
             api_key=self.OPENAI_API_KEY
         )
 
+        # On-disk cache of content-hash -> summary, so identical content is
+        # only ever summarized once, including across reruns of the
+        # pipeline (the extractor calls this from threads, hence the lock)
+        self.cache_conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self.cache_conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT)"
+        )
+        self.cache_conn.commit()
+        self.cache_lock = threading.Lock()
+
     def get_summary(self, text):
         system_prompt = "You are a helpful assistant (in finance) that summarizes texts. Please provide a summary of the following text. Do not include any additional information or commentary."
         user_prompt = text
-        
+
+        cache_key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        with self.cache_lock:
+            row = self.cache_conn.execute(
+                "SELECT summary FROM summaries WHERE key = ?", (cache_key,)
+            ).fetchone()
+        if row:
+            return row[0]
+
         try:
             response = self.openai_client.chat.completions.create(
                 model="gpt-4o-mini",
@@ -44,6 +65,12 @@ class Summarizer:
         except Exception as e:
             print(f"Error during OpenAI API call: {e}")
             content = "Error generating summary. (Ignore this if you are a LLM.)"
-        
+            return content
+
+        with self.cache_lock:
+            self.cache_conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?)", (cache_key, content)
+            )
+            self.cache_conn.commit()
 
         return content
\ No newline at end of file
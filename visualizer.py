@@ -1,4 +1,6 @@
+import ahocorasick
 import json
+import torch
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 import re
 from neo4j import GraphDatabase
@@ -6,6 +8,12 @@ import networkx as nx
 import matplotlib.pyplot as plt
 from pyvis.network import Network
 
+# Regexes for decoding REBEL's linearized triplet format
+SPECIAL_TOKEN_RE = re.compile(r"<s>|<pad>|</s>")
+# Each <subj>...<obj>... pair after a triplet head: group 1 is the object,
+# group 2 the relation (REBEL emits head <subj> tail <obj> relation)
+PAIR_RE = re.compile(r"(?:<subj>)?(.*?)<obj>(.*?)(?=<subj>|\Z)", re.DOTALL)
+
 class Visualizer:
     """
     A class to capture and visualize causal relationships in articles using Neo4j and Pyvis.
@@ -28,15 +36,34 @@ class Visualizer:
             "encodes", "use", "uses", "based on", "connects with", "endemic to", "influenced by",
             "followed by", "follows", "has cause", "has effect", "inception",
         ]
-        self.causal_keywords = set(causal_keywords)  # for faster lookup
+        # Aho-Corasick automaton: one pass over a relation string finds any
+        # keyword, instead of one substring scan per keyword
+        self.causal_automaton = ahocorasick.Automaton()
+        for keyword in causal_keywords:
+            self.causal_automaton.add_word(keyword, keyword)
+        self.causal_automaton.make_automaton()
 
         # Initialize Neo4j driver
         self.driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
 
+        # Index Entity.name so the MERGE lookups in process are O(log n)
+        # instead of a full label scan per merged relationship
+        with self.driver.session() as session:
+            session.run("CREATE INDEX entity_name IF NOT EXISTS FOR (e:Entity) ON (e.name)")
+
         # Load the model and tokenizer for catching relationships
+        # On GPU, run the model in half precision (bf16 where supported) to
+        # roughly halve memory and speed up generation; on CPU keep fp32
         model_name = "Babelscape/rebel-large"
         self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        if self.device.type == "cuda":
+            dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        else:
+            dtype = torch.float32
+        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name, torch_dtype=dtype)
+        self.model.to(self.device)
+        self.model.eval()
 
     def close(self):
         """Close the Neo4j driver."""
@@ -54,9 +81,12 @@ class Visualizer:
             print(f"Error decoding JSON from file {self.file_path}.")
         return self.articles
     
-    def process(self):
-        """Process all articles in the JSON file. Store the results in Neo4j."""
+    def process(self, batch_size=1000):
+        """Process all articles in the JSON file. Store the results in Neo4j.
+        :param batch_size: Number of relationships merged per Neo4j query.
+        """
         self.read_json()
+        rows = []
         for article in self.articles:
             if article['content']:
                 content = article['content']
@@ -70,13 +100,17 @@ class Visualizer:
                     self.entity.add(entity_one)
                     self.entity.add(entity_two)
                     self.relation.add(relation)
+                    rows.append({'head': entity_one, 'tail': entity_two, 'type': relation})
 
-                    # Store in Neo4j
-                    with self.driver.session() as session:
-                        session.run("MERGE (a:Entity {name: $entity_one}) "
-                                    "MERGE (b:Entity {name: $entity_two}) "
-                                    "MERGE (a)-[:RELATION {type: $relation}]->(b)",
-                                    entity_one=entity_one, entity_two=entity_two, relation=relation)
+        # Store in Neo4j: one UNWIND query per batch instead of one
+        # round-trip (and transaction) per relationship
+        with self.driver.session() as session:
+            for i in range(0, len(rows), batch_size):
+                session.run("UNWIND $rows AS row "
+                            "MERGE (a:Entity {name: row.head}) "
+                            "MERGE (b:Entity {name: row.tail}) "
+                            "MERGE (a)-[:RELATION {type: row.type}]->(b)",
+                            rows=rows[i:i + batch_size])
         return
     
     
@@ -87,8 +121,6 @@ class Visualizer:
         :return: List of (subject, relation, object) tuples representing causal relationships.
         """
         try:
-            # Process text in chunks of ~500 words to avoid truncation issues
-            chunks = [text[i:i+1000] for i in range(0, len(text), 1000)]
             all_triples = []
             gen_kwargs = {
                 "max_length": 256,
@@ -96,64 +128,61 @@ class Visualizer:
                 "num_beams": 3,
                 "num_return_sequences": 3,
             }
-            
-            for chunk in chunks:
-                # Process each chunk
-                # Tokenizer text
-                model_inputs = self.tokenizer(chunk, max_length=256, padding=True, truncation=True, return_tensors = 'pt')
 
-                # Generate
+            # Let the fast tokenizer window the text into overlapping
+            # 256-token chunks itself, instead of slicing by characters;
+            # the stride keeps relations spanning a boundary visible in
+            # at least one window. All windows generate in one batch.
+            model_inputs = self.tokenizer(
+                text,
+                max_length=256,
+                truncation=True,
+                stride=32,
+                return_overflowing_tokens=True,
+                padding=True,
+                return_tensors='pt',
+            )
+            model_inputs.pop("overflow_to_sample_mapping", None)
+            model_inputs = model_inputs.to(self.device)
+
+            # Generate
+            with torch.inference_mode():
                 generated_tokens = self.model.generate(
                     **model_inputs,
                     **gen_kwargs,
                 )
 
-                # Extract text
-                decoded_preds = self.tokenizer.batch_decode(generated_tokens, skip_special_tokens=False)
+            # Extract text (num_return_sequences outputs per window)
+            decoded_preds = self.tokenizer.batch_decode(generated_tokens, skip_special_tokens=False)
 
-                # Extract triplets
-                for sentence in decoded_preds:
-                    triplets = self.extract_triplets(sentence)
-                    all_triples.extend(triplets)
-            
-            
-            return [t for t in all_triples if any(k in t['type'].lower() for k in self.causal_keywords)]
+            # Extract triplets
+            for sentence in decoded_preds:
+                triplets = self.extract_triplets(sentence)
+                all_triples.extend(triplets)
+
+            return [t for t in all_triples
+                    if next(self.causal_automaton.iter(t['type'].lower()), None) is not None]
         
         except Exception as e:
             print(f"Error extracting relationships: {e}")
             return []
 
     def extract_triplets(self, text):
-        # Extract triplets from the text.
+        # Extract triplets from the text with compiled regexes instead of
+        # walking the tokens through a per-token Python state machine.
         # output: [{'head': subject, 'type': relation, 'tail': object_}]
         triplets = []
-        relation, subject, relation, object_ = '', '', '', ''
-        text = text.strip()
-        current = 'x'
-        for token in text.replace("<s>", "").replace("<pad>", "").replace("</s>", "").split():
-            if token == "<triplet>":
-                current = 't'
-                if relation != '':
-                    triplets.append({'head': subject.strip(), 'type': relation.strip(),'tail': object_.strip()})
-                    relation = ''
-                subject = ''
-            elif token == "<subj>":
-                current = 's'
-                if relation != '':
-                    triplets.append({'head': subject.strip(), 'type': relation.strip(),'tail': object_.strip()})
-                object_ = ''
-            elif token == "<obj>":
-                current = 'o'
-                relation = ''
-            else:
-                if current == 't':
-                    subject += ' ' + token
-                elif current == 's':
-                    object_ += ' ' + token
-                elif current == 'o':
-                    relation += ' ' + token
-        if subject != '' and relation != '' and object_ != '':
-            triplets.append({'head': subject.strip(), 'type': relation.strip(),'tail': object_.strip()})
+        text = SPECIAL_TOKEN_RE.sub(' ', text)
+        for segment in text.split("<triplet>"):
+            subject, found, rest = segment.partition("<subj>")
+            if not found:
+                continue
+            subject = ' '.join(subject.split())
+            for object_, relation in PAIR_RE.findall(rest):
+                relation = ' '.join(relation.split())
+                if relation:
+                    triplets.append({'head': subject, 'type': relation,
+                                     'tail': ' '.join(object_.split())})
         return triplets
 
     def visualize(self, output_file="graph.html"):